@@ -84,4 +84,7 @@ CELERY_RESULT_BACKEND = os.environ.get("REDIS_URL", "redis://redis:6379/0")
 CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
-CELERY_TIMEZONE = "UTC"
\ No newline at end of file
+CELERY_TIMEZONE = "UTC"
+
+# How often each worker re-checks the active CreditPolicy version.
+CREDIT_POLICY_REFRESH_SECONDS = int(os.environ.get("CREDIT_POLICY_REFRESH_SECONDS", 30))
@@ -0,0 +1,30 @@
+from django.contrib import admin, messages
+
+from .models import CreditPolicy
+
+
+@admin.register(CreditPolicy)
+class CreditPolicyAdmin(admin.ModelAdmin):
+    list_display = ('version', 'is_active', 'created_at')
+    list_filter = ('is_active',)
+    readonly_fields = ('is_active',)
+    actions = ['activate_policy']
+
+    def get_readonly_fields(self, request, obj=None):
+        # Saved versions are immutable; publish a new version instead.
+        if obj is not None:
+            return ('version', 'definition') + self.readonly_fields
+        return self.readonly_fields
+
+    def has_delete_permission(self, request, obj=None):
+        # Deleting and re-creating a version would let workers keep a stale definition.
+        return False
+
+    @admin.action(description='Activate selected policy')
+    def activate_policy(self, request, queryset):
+        if queryset.count() != 1:
+            self.message_user(request, 'Select exactly one policy to activate.', messages.ERROR)
+            return
+        policy = queryset.get()
+        policy.activate()
+        self.message_user(request, f'Credit Policy v{policy.version} is now active.', messages.SUCCESS)
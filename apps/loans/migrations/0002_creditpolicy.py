@@ -0,0 +1,33 @@
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loans', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CreditPolicy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveIntegerField(unique=True, validators=[django.core.validators.MinValueValidator(1)])),
+                ('definition', models.JSONField()),
+                ('is_active', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name_plural': 'credit policies',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='creditpolicy',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_active', True)), fields=('is_active',), name='single_active_credit_policy'),
+        ),
+        migrations.AddConstraint(
+            model_name='creditpolicy',
+            constraint=models.CheckConstraint(check=models.Q(('version__gte', 1)), name='credit_policy_version_gte_1'),
+        ),
+    ]
@@ -1,4 +1,6 @@
-from django.db import models
+from django.core.exceptions import ValidationError
+from django.core.validators import MinValueValidator
+from django.db import models, transaction
 from apps.customers.models import Customer
 
 class Loan(models.Model):
@@ -13,4 +15,50 @@ class Loan(models.Model):
     end_date = models.DateField()
 
     def __str__(self):
-        return f'Loan ID: {self.loan_id} for Customer: {self.customer.customer_id}'
\ No newline at end of file
+        return f'Loan ID: {self.loan_id} for Customer: {self.customer.customer_id}'
+
+
+class CreditPolicy(models.Model):
+    # Definitions are immutable once saved: workers only reload when the active
+    # version changes, so publish a new version instead of editing one.
+    version = models.PositiveIntegerField(unique=True, validators=[MinValueValidator(1)])
+    definition = models.JSONField()
+    is_active = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name_plural = 'credit policies'
+        constraints = [
+            models.UniqueConstraint(fields=['is_active'], condition=models.Q(is_active=True), name='single_active_credit_policy'),
+            models.CheckConstraint(check=models.Q(version__gte=1), name='credit_policy_version_gte_1'),
+        ]
+
+    def _check_immutable(self):
+        if self.pk is None:
+            return
+        original = CreditPolicy.objects.filter(pk=self.pk).values('version', 'definition').first()
+        if original and (original['version'] != self.version or original['definition'] != self.definition):
+            raise ValidationError('Credit policy versions are immutable. Publish a new version instead.')
+
+    def clean(self):
+        from .policy import compile_policy
+
+        self._check_immutable()
+        try:
+            compile_policy(self.definition, self.version)
+        except ValueError as e:
+            raise ValidationError({'definition': str(e)})
+
+    def save(self, *args, **kwargs):
+        self._check_immutable()
+        super().save(*args, **kwargs)
+
+    def activate(self):
+        """Makes this the only active policy."""
+        with transaction.atomic():
+            CreditPolicy.objects.filter(is_active=True).exclude(pk=self.pk).update(is_active=False)
+            self.is_active = True
+            self.save(update_fields=['is_active'])
+
+    def __str__(self):
+        return f'Credit Policy v{self.version}{" (active)" if self.is_active else ""}'
@@ -0,0 +1,185 @@
+import logging
+import time
+from bisect import bisect_left
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import DatabaseError
+
+logger = logging.getLogger(__name__)
+
+
+# Built-in policy, used until a CreditPolicy row is activated.
+DEFAULT_POLICY = {
+    "weights": {
+        "on_time_payments": 30,
+        "past_loans": 20,
+        "current_year_loans": 20,
+        "loan_volume": 30,
+    },
+    "past_loan_penalty": 4,          # Points lost per past loan
+    "current_year_loan_penalty": 5,  # Points lost per loan started this year
+    "volume_limit_multiplier": 2,    # Volume above approved_limit * this scores 0
+    "max_score": 100,
+    "emi_salary_cap_percent": 50,
+    # A score strictly above min_score falls into the band. Scores at or
+    # below the lowest min_score are rejected.
+    "bands": [
+        {"min_score": 50, "rate_floor": None},
+        {"min_score": 30, "rate_floor": "12.00"},
+        {"min_score": 10, "rate_floor": "16.00"},
+    ],
+}
+
+
+def _integer(value, name):
+    number = _finite_decimal(value, name)
+    if number != number.to_integral_value():
+        raise ValueError(f"{name} must be a whole number, got {value!r}.")
+    return int(number)
+
+
+def _finite_decimal(value, name):
+    if isinstance(value, bool):
+        raise TypeError(f"{name} must be a number, got {value!r}.")
+    number = Decimal(str(value))
+    if not number.is_finite():
+        raise ValueError(f"{name} must be a finite number, got {value!r}.")
+    return number
+
+
+class CompiledPolicy:
+    """A policy definition parsed once into plain numbers and a sorted band table."""
+
+    def __init__(self, definition, version=0, policy_id=None):
+        try:
+            weights = definition["weights"]
+            self.version = version
+            self.policy_id = policy_id
+            self.w_on_time = _integer(weights["on_time_payments"], "weights.on_time_payments")
+            self.w_past_loans = _integer(weights["past_loans"], "weights.past_loans")
+            self.w_current_year = _integer(weights["current_year_loans"], "weights.current_year_loans")
+            self.w_volume = _integer(weights["loan_volume"], "weights.loan_volume")
+            self.past_loan_penalty = _integer(definition["past_loan_penalty"], "past_loan_penalty")
+            self.current_year_loan_penalty = _integer(definition["current_year_loan_penalty"], "current_year_loan_penalty")
+            self.volume_limit_multiplier = _finite_decimal(definition["volume_limit_multiplier"], "volume_limit_multiplier")
+            self.max_score = _integer(definition["max_score"], "max_score")
+            cap_percent = _finite_decimal(definition["emi_salary_cap_percent"], "emi_salary_cap_percent")
+            if cap_percent <= 0:
+                raise ValueError(f"emi_salary_cap_percent must be greater than 0, got {cap_percent}.")
+            # Keep the percentage stable in messages: 50.0 shows as 50, 45.50 as 45.5.
+            if cap_percent == cap_percent.to_integral_value():
+                self.emi_salary_cap_percent = Decimal(int(cap_percent))
+            else:
+                self.emi_salary_cap_percent = cap_percent.normalize()
+
+            bands = sorted(
+                (
+                    (_integer(band["min_score"], "bands.min_score"),
+                     _finite_decimal(band["rate_floor"], "bands.rate_floor") if band.get("rate_floor") is not None else None)
+                    for band in definition["bands"]
+                ),
+                key=lambda band: band[0],
+            )
+        except (KeyError, TypeError, ValueError, ArithmeticError) as e:
+            raise ValueError(f"Invalid credit policy definition: {type(e).__name__} - {e}")
+
+        if not bands:
+            raise ValueError("Invalid credit policy definition: at least one band is required.")
+        thresholds = [min_score for min_score, _ in bands]
+        if len(set(thresholds)) != len(thresholds):
+            raise ValueError("Invalid credit policy definition: band min_score values must be unique.")
+
+        # Ascending thresholds for bisect, with the matching rate floors.
+        self.band_thresholds = thresholds
+        self.band_rate_floors = [rate_floor for _, rate_floor in bands]
+        self.emi_salary_cap = self.emi_salary_cap_percent / Decimal('100')
+
+    def score(self, emis_paid_on_time, total_tenure, num_loans, current_year_loans,
+              total_loan_volume, approved_limit, current_debt):
+        """Credit score from a customer's aggregated loan history."""
+        # v. Sum of current loans > approved limit
+        if current_debt > approved_limit:
+            return 0
+
+        # i. Past Loans paid on time
+        if total_tenure > 0:
+            score_a = (emis_paid_on_time / total_tenure) * self.w_on_time
+        else:
+            score_a = self.w_on_time  # No past loans, good start
+
+        # ii. No of loans taken in past
+        score_b = max(0, self.w_past_loans - num_loans * self.past_loan_penalty)
+
+        # iii. Loan activity in current year
+        score_c = max(0, self.w_current_year - current_year_loans * self.current_year_loan_penalty)
+
+        # iv. Loan approved volume
+        if total_loan_volume > approved_limit * self.volume_limit_multiplier:
+            score_d = 0
+        else:
+            score_d = self.w_volume
+
+        return min(self.max_score, int(score_a + score_b + score_c + score_d))
+
+    def band_for(self, credit_score):
+        """
+        Returns (approved, rate_floor) for a credit score. rate_floor is None
+        when any requested rate is accepted.
+        """
+        index = bisect_left(self.band_thresholds, credit_score)
+        if index == 0:
+            return False, None
+        return True, self.band_rate_floors[index - 1]
+
+    def exceeds_salary_cap(self, total_emi, monthly_salary):
+        return Decimal(total_emi) > Decimal(monthly_salary) * self.emi_salary_cap
+
+
+def compile_policy(definition, version=0, policy_id=None):
+    return CompiledPolicy(definition, version, policy_id)
+
+
+_compiled_policy = None
+_last_checked = None
+
+
+def get_active_policy():
+    """
+    Returns the compiled active policy for this process. The active policy row is
+    re-checked at most every CREDIT_POLICY_REFRESH_SECONDS, and the definition is
+    only fetched and recompiled when that row changes. Rows are tracked by pk, so
+    a version deleted and re-created under the same number is still reloaded.
+    """
+    global _compiled_policy, _last_checked
+    from .models import CreditPolicy
+
+    now = time.monotonic()
+    refresh_seconds = getattr(settings, 'CREDIT_POLICY_REFRESH_SECONDS', 30)
+    if _compiled_policy is not None and _last_checked is not None and now - _last_checked < refresh_seconds:
+        return _compiled_policy
+    _last_checked = now
+
+    try:
+        active = CreditPolicy.objects.filter(is_active=True).values_list('pk', 'version').first()
+        if active is None:
+            if _compiled_policy is None or _compiled_policy.policy_id is not None:
+                _compiled_policy = compile_policy(DEFAULT_POLICY)
+            return _compiled_policy
+
+        active_pk, active_version = active
+        if _compiled_policy is None or _compiled_policy.policy_id != active_pk:
+            definition = CreditPolicy.objects.values_list('definition', flat=True).get(pk=active_pk)
+            _compiled_policy = compile_policy(definition, active_version, active_pk)
+    except (ValueError, DatabaseError, CreditPolicy.DoesNotExist) as e:
+        # Keep deciding with the last good policy rather than failing requests.
+        logger.exception("Could not load the active credit policy: %s - %s", type(e).__name__, e)
+        if _compiled_policy is None:
+            _compiled_policy = compile_policy(DEFAULT_POLICY)
+    return _compiled_policy
+
+
+def reset_policy_cache():
+    """Forces the next get_active_policy() call to re-check the active version."""
+    global _last_checked
+    _last_checked = None
@@ -1,46 +1,63 @@
 
 from datetime import date
-from django.db.models import Sum
+from django.db.models import Count, Q, Sum
 from decimal import Decimal 
 from dateutil.relativedelta import relativedelta
 
 from .models import Loan, Customer
+from .policy import compile_policy, get_active_policy
 
 
-def calculate_credit_score(customer: Customer):
-    # i. Past Loans paid on time
-    all_loans = Loan.objects.filter(customer=customer)
-    total_emis_paid = all_loans.aggregate(Sum('emis_paid_on_time'))['emis_paid_on_time__sum'] or 0
-    total_tenure = all_loans.aggregate(Sum('tenure'))['tenure__sum'] or 0
-    
-    if total_tenure > 0:
-        on_time_payment_ratio = total_emis_paid / total_tenure
-        credit_score_a = on_time_payment_ratio * 30  # Weight: 30
-    else:
-        credit_score_a = 30 # No past loans, good start
-
-    # ii. No of loans taken in past
-    num_loans = all_loans.count()
-    credit_score_b = max(0, 20 - num_loans * 4) # Weight: 20
-
-    # iii. Loan activity in current year
-    current_year_loans = all_loans.filter(start_date__year=date.today().year).count()
-    credit_score_c = max(0, 20 - current_year_loans * 5) # Weight: 20
-
-    # iv. Loan approved volume
-    total_loan_volume = all_loans.aggregate(Sum('loan_amount'))['loan_amount__sum'] or 0
-    if total_loan_volume > customer.approved_limit * 2: # High volume might be risky
-        credit_score_d = 0
-    else:
-        credit_score_d = 30 # Weight: 30
-
-    # v. Sum of current loans > approved limit
-    current_loans_amount = customer.current_debt
-    if current_loans_amount > customer.approved_limit:
-        return 0
-
-    credit_score = int(credit_score_a + credit_score_b + credit_score_c + credit_score_d)
-    return min(100, credit_score)
+def _loan_stat_aggregates():
+    # The per-customer inputs the credit policy scores on.
+    return {
+        'emis_paid_on_time': Sum('emis_paid_on_time'),
+        'total_tenure': Sum('tenure'),
+        'num_loans': Count('loan_id'),
+        'current_year_loans': Count('loan_id', filter=Q(start_date__year=date.today().year)),
+        'total_loan_volume': Sum('loan_amount'),
+    }
+
+
+def _loan_stats_by_customer(customers, include_current_emis=False):
+    aggregates = _loan_stat_aggregates()
+    if include_current_emis:
+        aggregates['current_emis'] = Sum('monthly_payment', filter=Q(end_date__gte=date.today()))
+    return (
+        Loan.objects.filter(customer__in=[customer.customer_id for customer in customers])
+        .values('customer_id')
+        .annotate(**aggregates)
+        .order_by()
+    )
+
+
+def _score_from_stats(policy, customer, stats):
+    return policy.score(
+        emis_paid_on_time=stats.get('emis_paid_on_time') or 0,
+        total_tenure=stats.get('total_tenure') or 0,
+        num_loans=stats.get('num_loans') or 0,
+        current_year_loans=stats.get('current_year_loans') or 0,
+        total_loan_volume=stats.get('total_loan_volume') or 0,
+        approved_limit=customer.approved_limit,
+        current_debt=customer.current_debt,
+    )
+
+
+def calculate_credit_score(customer: Customer, policy=None):
+    policy = policy or get_active_policy()
+    stats = Loan.objects.filter(customer=customer).aggregate(**_loan_stat_aggregates())
+    return _score_from_stats(policy, customer, stats)
+
+
+def calculate_credit_scores(customers, policy=None):
+    # Scores many customers with a single grouped query, keyed by customer_id.
+    policy = policy or get_active_policy()
+    customers = list(customers)
+    stats_by_customer = {row['customer_id']: row for row in _loan_stats_by_customer(customers)}
+    return {
+        customer.customer_id: _score_from_stats(policy, customer, stats_by_customer.get(customer.customer_id, {}))
+        for customer in customers
+    }
 
 
 def calculate_emi(principal, annual_rate, tenure_months):
@@ -63,16 +80,17 @@ def calculate_emi(principal, annual_rate, tenure_months):
     return round(emi, 2)
 
 
-def check_loan_eligibility(customer: Customer, requested_interest_rate, loan_amount, tenure):
-    credit_score = calculate_credit_score(customer)
+def check_loan_eligibility(customer: Customer, requested_interest_rate, loan_amount, tenure, policy=None):
+    policy = policy or get_active_policy()
+    credit_score = calculate_credit_score(customer, policy)
     
     current_emis = Loan.objects.filter(customer=customer, end_date__gte=date.today()).aggregate(Sum('monthly_payment'))['monthly_payment__sum'] or 0
     
     # We still need to calculate the potential new EMI for the check
     potential_new_emi = calculate_emi(loan_amount, requested_interest_rate, tenure)
     
-    # CHECK 1: Total EMI must be <= 50% of monthly salary
-    if (current_emis + potential_new_emi) > (customer.monthly_salary * 0.5):
+    # CHECK 1: Total EMI must be within the policy's share of monthly salary
+    if policy.exceeds_salary_cap(current_emis + potential_new_emi, customer.monthly_salary):
         # Return a full-shaped dictionary, even on failure
         return {
             "customer_id": customer.customer_id,
@@ -81,29 +99,15 @@ def check_loan_eligibility(customer: Customer, requested_interest_rate, loan_amo
             "corrected_interest_rate": None,
             "tenure": tenure,
             "monthly_installment": potential_new_emi, # Show what the installment would have been
-            "message": "Total EMI exceeds 50% of monthly salary." 
+            "message": f"Total EMI exceeds {policy.emi_salary_cap_percent}% of monthly salary." 
         }
 
     # CHECK 2: Based on credit score
-    approval = False
+    approval, rate_floor = policy.band_for(credit_score)
     corrected_interest_rate = requested_interest_rate
 
-    if credit_score > 50:
-        approval = True
-    elif 50 >= credit_score > 30:
-        if requested_interest_rate > 12:
-            approval = True
-        else:
-            corrected_interest_rate = Decimal('12.00')
-            approval = True
-    elif 30 >= credit_score > 10:
-        if requested_interest_rate > 16:
-            approval = True
-        else:
-            corrected_interest_rate = Decimal('16.00')
-            approval = True
-    else: # score <= 10
-        approval = False
+    if approval and rate_floor is not None and not requested_interest_rate > rate_floor:
+        corrected_interest_rate = rate_floor
         
     final_interest_rate = corrected_interest_rate if corrected_interest_rate != requested_interest_rate else requested_interest_rate
     
@@ -130,4 +134,54 @@ def check_loan_eligibility(customer: Customer, requested_interest_rate, loan_amo
         "tenure": tenure,
         "monthly_installment": monthly_installment,
         "message": "Loan approved." 
-    }
\ No newline at end of file
+    }
+
+
+def compare_policies(candidate_definition, sample_size=100):
+    """
+    What-if run: re-scores a random sample of customers under the active policy
+    and a candidate definition, without activating the candidate. Approval
+    combines the score band with the salary cap applied to the customer's
+    current EMIs, since no new loan is requested here.
+    """
+    current = get_active_policy()
+    candidate = compile_policy(candidate_definition)
+
+    customers = list(Customer.objects.order_by('?')[:sample_size])
+    stats_by_customer = {
+        row['customer_id']: row
+        for row in _loan_stats_by_customer(customers, include_current_emis=True)
+    }
+
+    results = []
+    for customer in customers:
+        stats = stats_by_customer.get(customer.customer_id, {})
+        current_emis = stats.get('current_emis') or 0
+        current_score = _score_from_stats(current, customer, stats)
+        candidate_score = _score_from_stats(candidate, customer, stats)
+        current_band_approval, current_rate_floor = current.band_for(current_score)
+        candidate_band_approval, candidate_rate_floor = candidate.band_for(candidate_score)
+        current_over_cap = current.exceeds_salary_cap(current_emis, customer.monthly_salary)
+        candidate_over_cap = candidate.exceeds_salary_cap(current_emis, customer.monthly_salary)
+        results.append({
+            "customer_id": customer.customer_id,
+            "current_score": current_score,
+            "candidate_score": candidate_score,
+            "current_over_salary_cap": current_over_cap,
+            "candidate_over_salary_cap": candidate_over_cap,
+            "current_approval": current_band_approval and not current_over_cap,
+            "candidate_approval": candidate_band_approval and not candidate_over_cap,
+            "current_rate_floor": current_rate_floor,
+            "candidate_rate_floor": candidate_rate_floor,
+        })
+
+    return {
+        "current_version": current.version,
+        "sample_size": len(results),
+        "scores_changed": sum(1 for r in results if r["current_score"] != r["candidate_score"]),
+        "salary_cap_changed": sum(1 for r in results if r["current_over_salary_cap"] != r["candidate_over_salary_cap"]),
+        "approvals_gained": sum(1 for r in results if r["candidate_approval"] and not r["current_approval"]),
+        "approvals_lost": sum(1 for r in results if r["current_approval"] and not r["candidate_approval"]),
+        "rate_floors_changed": sum(1 for r in results if r["current_rate_floor"] != r["candidate_rate_floor"]),
+        "results": results,
+    }
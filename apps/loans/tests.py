@@ -0,0 +1,228 @@
+import copy
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+
+from dateutil.relativedelta import relativedelta
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.test import TestCase
+
+from apps.customers.models import Customer
+from .models import CreditPolicy, Loan
+from . import services
+from .policy import DEFAULT_POLICY, compile_policy, get_active_policy, reset_policy_cache
+
+
+def old_credit_decision(credit_score, requested_interest_rate):
+    # The hard-coded chain DEFAULT_POLICY replaced: (approval, corrected_interest_rate).
+    if credit_score > 50:
+        return True, requested_interest_rate
+    elif 50 >= credit_score > 30:
+        return True, requested_interest_rate if requested_interest_rate > 12 else Decimal('12.00')
+    elif 30 >= credit_score > 10:
+        return True, requested_interest_rate if requested_interest_rate > 16 else Decimal('16.00')
+    return False, requested_interest_rate
+
+
+class PolicyTestCase(TestCase):
+    def setUp(self):
+        reset_policy_cache()
+        self.no_loans = Customer.objects.create(
+            first_name='No', last_name='Loans', phone_number='1', monthly_salary=1000, approved_limit=100000,
+        )
+        self.one_loan = Customer.objects.create(
+            first_name='One', last_name='Loan', phone_number='2', monthly_salary=1000, approved_limit=100000,
+        )
+        Loan.objects.create(
+            customer=self.one_loan, loan_amount=4000, tenure=10, interest_rate=Decimal('10.00'),
+            monthly_payment=Decimal('400.00'), emis_paid_on_time=10,
+            start_date=date.today(), end_date=date.today() + relativedelta(months=10),
+        )
+
+    def tearDown(self):
+        reset_policy_cache()
+
+
+class DefaultPolicyTests(PolicyTestCase):
+    def test_matches_old_chain_at_band_boundaries(self):
+        rates = [Decimal('11.99'), Decimal('12.00'), Decimal('12.01'), Decimal('16.00'), Decimal('16.01')]
+        for credit_score in [0, 9, 10, 11, 29, 30, 31, 49, 50, 51, 100]:
+            for rate in rates:
+                with self.subTest(credit_score=credit_score, rate=rate):
+                    expected_approval, expected_rate = old_credit_decision(credit_score, rate)
+                    with mock.patch.object(services, 'calculate_credit_score', return_value=credit_score):
+                        result = services.check_loan_eligibility(self.no_loans, rate, 1000, 12)
+                    self.assertEqual(result['approval'], expected_approval)
+                    if expected_approval and expected_rate != rate:
+                        self.assertEqual(result['corrected_interest_rate'], expected_rate)
+                    else:
+                        self.assertIsNone(result['corrected_interest_rate'])
+
+    def test_salary_cap_at_exactly_fifty_percent(self):
+        policy = compile_policy(DEFAULT_POLICY)
+        self.assertFalse(policy.exceeds_salary_cap(Decimal('500.00'), 1000))
+        self.assertTrue(policy.exceeds_salary_cap(Decimal('500.01'), 1000))
+
+        # 12000 at 0% over 12 months is a 1000 EMI, exactly half of 2000.
+        self.no_loans.monthly_salary = 2000
+        with mock.patch.object(services, 'calculate_credit_score', return_value=80):
+            result = services.check_loan_eligibility(self.no_loans, Decimal('0'), 12000, 12)
+        self.assertTrue(result['approval'])
+
+        self.no_loans.monthly_salary = 1999
+        with mock.patch.object(services, 'calculate_credit_score', return_value=80):
+            result = services.check_loan_eligibility(self.no_loans, Decimal('0'), 12000, 12)
+        self.assertFalse(result['approval'])
+        self.assertEqual(result['message'], 'Total EMI exceeds 50% of monthly salary.')
+
+    def test_bulk_scores_match_scalar_scores(self):
+        over_limit = Customer.objects.create(
+            first_name='Over', last_name='Limit', phone_number='3', monthly_salary=1000,
+            approved_limit=1000, current_debt=Decimal('5000.00'),
+        )
+        customers = [self.no_loans, self.one_loan, over_limit]
+        bulk_scores = services.calculate_credit_scores(customers)
+        for customer in customers:
+            self.assertEqual(bulk_scores[customer.customer_id], services.calculate_credit_score(customer))
+        self.assertEqual(bulk_scores[self.no_loans.customer_id], 100)
+        self.assertEqual(bulk_scores[self.one_loan.customer_id], 91)
+        self.assertEqual(bulk_scores[over_limit.customer_id], 0)
+
+
+class ActivePolicyTests(PolicyTestCase):
+    def test_switches_version_and_falls_back_to_default(self):
+        self.assertEqual(get_active_policy().version, 0)
+
+        definition = copy.deepcopy(DEFAULT_POLICY)
+        definition['emi_salary_cap_percent'] = 40
+        policy = CreditPolicy.objects.create(version=2, definition=definition)
+        policy.activate()
+        reset_policy_cache()
+        self.assertEqual(get_active_policy().version, 2)
+        self.assertEqual(get_active_policy().emi_salary_cap_percent, Decimal('40'))
+
+        CreditPolicy.objects.update(is_active=False)
+        reset_policy_cache()
+        self.assertEqual(get_active_policy().version, 0)
+
+    def test_invalid_active_definition_keeps_last_good_policy(self):
+        CreditPolicy.objects.create(version=3, definition={'bands': []}, is_active=True)
+        with self.assertLogs('apps.loans.policy', level='ERROR'):
+            self.assertEqual(get_active_policy().version, 0)
+
+    def test_rejects_non_finite_values(self):
+        for path in ['rate_floor', 'emi_salary_cap_percent', 'volume_limit_multiplier']:
+            for value in ['NaN', 'sNaN', 'Infinity']:
+                with self.subTest(path=path, value=value):
+                    definition = copy.deepcopy(DEFAULT_POLICY)
+                    if path == 'rate_floor':
+                        definition['bands'][1]['rate_floor'] = value
+                    else:
+                        definition[path] = value
+                    with self.assertRaises(ValueError):
+                        compile_policy(definition)
+                    with self.assertRaises(ValidationError):
+                        CreditPolicy(version=10, definition=definition).full_clean()
+
+    def test_rejects_non_positive_salary_cap(self):
+        for value in [0, -10]:
+            with self.subTest(value=value):
+                definition = copy.deepcopy(DEFAULT_POLICY)
+                definition['emi_salary_cap_percent'] = value
+                with self.assertRaises(ValueError):
+                    compile_policy(definition)
+
+    def test_rejects_fractional_weights_and_penalties(self):
+        definition = copy.deepcopy(DEFAULT_POLICY)
+        definition['weights']['past_loans'] = 20.9
+        with self.assertRaises(ValueError):
+            compile_policy(definition)
+
+        definition = copy.deepcopy(DEFAULT_POLICY)
+        definition['past_loan_penalty'] = '4.5'
+        with self.assertRaises(ValueError):
+            compile_policy(definition)
+
+        definition = copy.deepcopy(DEFAULT_POLICY)
+        definition['weights']['past_loans'] = 20.0
+        self.assertEqual(compile_policy(definition).w_past_loans, 20)
+
+    def test_rejects_duplicate_band_thresholds(self):
+        definition = copy.deepcopy(DEFAULT_POLICY)
+        definition['bands'] = [{'min_score': 30, 'rate_floor': None}, {'min_score': 30, 'rate_floor': '20'}]
+        with self.assertRaises(ValueError):
+            compile_policy(definition)
+
+    def test_salary_cap_message_is_normalized(self):
+        definition = copy.deepcopy(DEFAULT_POLICY)
+        definition['emi_salary_cap_percent'] = 50.0
+        policy = compile_policy(definition)
+        self.no_loans.monthly_salary = 100
+        result = services.check_loan_eligibility(self.no_loans, Decimal('0'), 12000, 12, policy)
+        self.assertEqual(result['message'], 'Total EMI exceeds 50% of monthly salary.')
+
+        definition['emi_salary_cap_percent'] = '45.50'
+        self.assertEqual(str(compile_policy(definition).emi_salary_cap_percent), '45.5')
+
+    def test_version_zero_is_rejected(self):
+        with self.assertRaises(ValidationError):
+            CreditPolicy(version=0, definition=copy.deepcopy(DEFAULT_POLICY)).full_clean()
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            CreditPolicy.objects.create(version=0, definition=copy.deepcopy(DEFAULT_POLICY), is_active=True)
+
+    def test_recreated_version_is_reloaded(self):
+        definition = copy.deepcopy(DEFAULT_POLICY)
+        definition['emi_salary_cap_percent'] = 40
+        CreditPolicy.objects.create(version=8, definition=definition, is_active=True)
+        self.assertEqual(get_active_policy().emi_salary_cap_percent, Decimal('40'))
+
+        CreditPolicy.objects.filter(version=8).delete()
+        definition['emi_salary_cap_percent'] = 30
+        CreditPolicy.objects.create(version=8, definition=definition, is_active=True)
+        reset_policy_cache()
+        self.assertEqual(get_active_policy().emi_salary_cap_percent, Decimal('30'))
+
+    def test_saved_versions_are_immutable(self):
+        policy = CreditPolicy.objects.create(version=4, definition=copy.deepcopy(DEFAULT_POLICY))
+        policy.definition['emi_salary_cap_percent'] = 60
+        with self.assertRaises(ValidationError):
+            policy.save()
+
+    def test_only_one_active_policy(self):
+        first = CreditPolicy.objects.create(version=5, definition=copy.deepcopy(DEFAULT_POLICY), is_active=True)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            CreditPolicy.objects.create(version=6, definition=copy.deepcopy(DEFAULT_POLICY), is_active=True)
+
+        second = CreditPolicy.objects.create(version=7, definition=copy.deepcopy(DEFAULT_POLICY))
+        second.activate()
+        first.refresh_from_db()
+        self.assertFalse(first.is_active)
+        self.assertTrue(second.is_active)
+
+
+class ComparePoliciesTests(PolicyTestCase):
+    def test_band_change(self):
+        candidate = copy.deepcopy(DEFAULT_POLICY)
+        candidate['bands'] = [{'min_score': 95, 'rate_floor': None}]
+        report = services.compare_policies(candidate)
+
+        self.assertEqual(report['sample_size'], 2)
+        self.assertEqual(report['scores_changed'], 0)
+        self.assertEqual(report['salary_cap_changed'], 0)
+        self.assertEqual(report['approvals_gained'], 0)
+        self.assertEqual(report['approvals_lost'], 1)
+        lost = [r for r in report['results'] if r['current_approval'] and not r['candidate_approval']]
+        self.assertEqual(lost[0]['customer_id'], self.one_loan.customer_id)
+
+    def test_salary_cap_change(self):
+        # one_loan pays 400 a month on a 1000 salary: within 50%, over 30%.
+        candidate = copy.deepcopy(DEFAULT_POLICY)
+        candidate['emi_salary_cap_percent'] = 30
+        report = services.compare_policies(candidate)
+
+        self.assertEqual(report['scores_changed'], 0)
+        self.assertEqual(report['rate_floors_changed'], 0)
+        self.assertEqual(report['salary_cap_changed'], 1)
+        self.assertEqual(report['approvals_gained'], 0)
+        self.assertEqual(report['approvals_lost'], 1)